@@ -0,0 +1,157 @@
+# src/shared_config/_models.py
+
+"""
+Pydantic models for the application settings.
+
+Kept apart from the loader in config.py so their core schemas are built once
+per process, even if the loader module is reloaded.
+"""
+
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, computed_field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# --- TYPE-SAFE, HIERARCHICAL MODELS ---
+
+# --- Infrastructure Models ---
+class ExchangeSettings(BaseModel):
+    client_id: str
+    client_secret: str
+    ws_url: Optional[str] = None
+    rest_url: Optional[str] = None
+
+class RedisSettings(BaseModel):
+    url: str
+    db: int
+    password: Optional[str] = None
+
+class PostgresSettings(BaseModel):
+    user: str
+    password: str
+    host: str
+    port: int
+    db: str
+
+class OCISettings(BaseModel):
+    user: str
+    password: str
+    dsn: str
+    wallet_dir: str
+
+# --- Business Logic Models (for executor.toml) ---
+class RiskManagementSettings(BaseModel):
+    max_order_notional_usd: float
+    max_position_notional_usd: float
+    price_deviation_tolerance_pct: float
+    equity_dust_threshold: float
+
+class ReconciliationSettings(BaseModel):
+    interval_seconds: int
+    initial_delay_seconds: int
+
+class ExecutorServiceSettings(BaseModel):
+    reconciliation: ReconciliationSettings
+
+class RegimeParameterSettings(BaseModel):
+    hedge_ratio: float
+    execution_horizon_minutes: int
+    order_type: str
+    time_in_force: str
+    ttl_seconds: int
+
+class UsdSyntheticStrategySettings(BaseModel):
+    drift_threshold_contracts: int
+    twap_clip_pct: float
+
+class StrategySettings(BaseModel):
+    usdSynthetic: UsdSyntheticStrategySettings
+
+class RedisStreamSettings(BaseModel):
+    max_retries: int = 3
+
+class TradableItem(BaseModel):
+    spot: List[str]
+
+class AnalyzerSettings(BaseModel):
+    # These fields would be moved from the TOML file into this structure
+    instrument_sync_interval_s: int = 3600
+    anomaly_check_interval_s: int = 15
+
+# --- THE CENTRAL SERVICE CONTAINER ---
+class ServiceSettings(BaseModel):
+    """This model contains all optional, service-specific operational configs."""
+    executor: Optional[ExecutorServiceSettings] = None
+    analyzer: Optional[AnalyzerSettings] = None
+    # distributor: Optional[DistributorSettings] = None # Future
+    # maintenance: Optional[MaintenanceSettings] = None # Future
+
+# --- COMPOSITED TOP-LEVEL SETTINGS OBJECT ---
+class AppSettings(BaseModel):
+    service_name: str
+    environment: str
+    
+    # --- Infrastructure (Mandatory) ---
+    exchanges: Dict[str, ExchangeSettings]
+    redis: RedisSettings
+    redis_streams: RedisStreamSettings = Field(default_factory=RedisStreamSettings) # Added
+
+    # --- Infrastructure (Optional) ---
+    postgres: Optional[PostgresSettings] = None
+    oci: Optional[OCISettings] = None
+    
+    # --- Service-Specific Business Logic (All Optional) ---
+    # Pydantic will only populate these if the sections exist in the TOML file.
+    risk_management: Optional[RiskManagementSettings] = None
+    services: Optional[ServiceSettings] = None
+    regime_parameters: Optional[Dict[str, RegimeParameterSettings]] = None
+    strategies: Optional[StrategySettings] = None
+    tradable: List[TradableItem] = []
+    analyzer: Optional[AnalyzerSettings] = None
+    
+    # --- Derived Properties ---
+    # Computed from `tradable` on first access and cached per instance. The cache is
+    # dropped when `tradable` is reassigned or the model is copied; mutating `tradable`
+    # in place does not refresh it. Assigning `hedged_currencies` overrides the cached
+    # value, but it is not accepted as constructor/model_validate input.
+    @computed_field
+    @cached_property
+    def hedged_currencies(self) -> List[str]:
+        return sorted({symbol for item in self.tradable for symbol in item.spot})
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name == "tradable":
+            self.__dict__.pop("hedged_currencies", None)
+
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None, deep: bool = False) -> "AppSettings":
+        copy = super().model_copy(update=update, deep=deep)
+        copy.__dict__.pop("hedged_currencies", None)
+        return copy
+
+# --- Environment Variable Loader (Correct) ---
+class RawEnvSettings(BaseSettings):
+    SERVICE_NAME: str = "unknown"
+    ENVIRONMENT: str = "development"
+    REDIS_URL: str = "redis://localhost:6379"
+    REDIS_DB: int = 0
+    REDIS_PASSWORD: Optional[str] = None
+    POSTGRES_USER: str = "trading_app"
+    POSTGRES_PASSWORD: Optional[str] = None
+    POSTGRES_PASSWORD_FILE: Optional[str] = None
+    POSTGRES_HOST: str = "postgres"
+    POSTGRES_PORT: int = 5432
+    POSTGRES_DB: str = "trading"
+    DERIBIT_CLIENT_ID_FILE: Optional[str] = None
+    DERIBIT_CLIENT_SECRET_FILE: Optional[str] = None
+    OCI_DSN_FILE: Optional[str] = None
+    OCI_USER_FILE: Optional[str] = None
+    OCI_PASSWORD_FILE: Optional[str] = None
+    OCI_WALLET_DIR: Optional[str] = None
+    # Partial per-exchange settings, e.g. EXCHANGES__DERIBIT__WS_URL -> {"deribit": {"ws_url": ...}}.
+    # Parsed natively by pydantic-settings via env_nested_delimiter. Every exchange named here
+    # becomes an ExchangeSettings, so it needs CLIENT_ID and CLIENT_SECRET; only Deribit can
+    # take them from DERIBIT_CLIENT_*_FILE instead.
+    EXCHANGES: Dict[str, Dict[str, Optional[str]]] = {}
+    model_config = SettingsConfigDict(env_file=".env", env_nested_delimiter="__", extra="ignore")
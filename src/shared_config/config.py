@@ -1,179 +1,141 @@
 
 # src/shared_config/config.py
 
+import logging
 import os
+import tomllib
+import types
+from collections.abc import Iterable
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-import tomli
-from loguru import logger as log
-from pydantic import BaseModel, ConfigDict, Field, model_validator
-from pydantic_settings import BaseSettings, SettingsConfigDict
-
-# --- Helper Function (Correct and necessary) ---
+from typing import Any, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+
+# Models live in _models; they are re-exported so `shared_config.config.X` keeps working.
+from ._models import (  # noqa: F401
+    AnalyzerSettings,
+    AppSettings,
+    ExchangeSettings,
+    ExecutorServiceSettings,
+    OCISettings,
+    PostgresSettings,
+    RawEnvSettings,
+    ReconciliationSettings,
+    RedisSettings,
+    RedisStreamSettings,
+    RegimeParameterSettings,
+    RiskManagementSettings,
+    ServiceSettings,
+    StrategySettings,
+    TradableItem,
+    UsdSyntheticStrategySettings,
+)
+
+# stdlib logging keeps loguru out of this module's import chain. The INFO startup
+# messages are only emitted once the service configures logging (the root logger
+# defaults to WARNING); services on loguru can route them with an InterceptHandler.
+log = logging.getLogger(__name__)
+
+# Directory holding the packaged <service>.toml files, resolved once at import.
+_CONFIG_DIR: Path = Path(__file__).resolve().parent
+
+# Services that connect to PostgreSQL and therefore need its password at startup.
+_SERVICES_REQUIRING_DB: frozenset[str] = frozenset(
+    {"distributor", "executor", "janitor", "maintenance", "analyzer", "backfill"}
+)
+
+# --- Helper Functions (Correct and necessary) ---
 def read_secret(value: str | None, file_path: str | None) -> str | None:
-    if file_path and os.path.exists(file_path):
+    if not file_path:
+        return value
+    # EAFP: a single open() instead of an exists() probe followed by open().
+    try:
+        return Path(file_path).read_text().strip()
+    except FileNotFoundError:
+        return value
+    except (OSError, UnicodeDecodeError) as e:
+        log.error(f"Failed to read secret from file {file_path}: {e}")
+        return None
+
+def _read_secret_files(file_paths: Iterable[str | None]) -> dict[str, str | None]:
+    """Read a batch of secret files with one os.scandir() per parent directory.
+
+    Returns {file_path: content} for the files that exist; missing files are
+    left out so callers can fall back to an env value with `dict.get`.
+
+    Tradeoff: every present file is still opened, so the listing is one extra
+    syscall per directory compared with plain EAFP reads. It pays off only when
+    several configured secret files are missing, since those are not opened.
+    """
+    paths_by_dir: dict[str, set[str]] = {}
+    for file_path in file_paths:
+        if file_path:
+            paths_by_dir.setdefault(os.path.dirname(file_path) or ".", set()).add(file_path)
+
+    secrets: dict[str, str | None] = {}
+    for directory, paths in paths_by_dir.items():
         try:
-            return Path(file_path).read_text().strip()
-        except Exception as e:
-            log.error(f"Failed to read secret from file {file_path}: {e}")
-            return None
+            with os.scandir(directory) as entries:
+                present = {entry.name for entry in entries if entry.is_file()}
+        except FileNotFoundError:
+            continue
+        except OSError:
+            # Directory cannot be listed; let read_secret() open each file directly.
+            present = {os.path.basename(file_path) for file_path in paths}
+        for file_path in paths:
+            if os.path.basename(file_path) in present:
+                secrets[file_path] = read_secret(None, file_path)
+    return secrets
+
+# --- TOML parsing: rtoml (Rust) when installed, stdlib tomllib otherwise ---
+try:
+    import rtoml
+except ImportError:
+    rtoml = None
+
+def _load_toml(path: Path) -> dict[str, Any]:
+    # Read the whole file in one call and parse from memory; cheaper than the
+    # parser pulling many small reads from a file handle.
+    text = path.read_bytes().decode("utf-8")
+    if rtoml is not None:
+        return rtoml.loads(text)
+    return tomllib.loads(text)
+
+# --- Validation: one TypeAdapter per model, reused across load_settings() calls ---
+@lru_cache(maxsize=4)
+def _adapter(model_cls: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(model_cls)
+
+# --- Trusted fast-path for production startup ---
+def _construct_trusted(annotation: Any, value: Any) -> Any:
+    """Recursively build `annotation` from trusted `value` without Pydantic validation.
+
+    Walks Optional/List/Dict annotations and calls `model_construct` on every nested
+    BaseModel. Defaults are still applied, but no type checks or validators run.
+    """
+    if value is None or isinstance(value, BaseModel):
+        return value
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        for arg in get_args(annotation):
+            if arg is not type(None):
+                return _construct_trusted(arg, value)
+    if origin is list and isinstance(value, list):
+        (item_type,) = get_args(annotation)
+        return [_construct_trusted(item_type, item) for item in value]
+    if origin is dict and isinstance(value, dict):
+        _, value_type = get_args(annotation)
+        return {key: _construct_trusted(value_type, item) for key, item in value.items()}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel) and isinstance(value, dict):
+        fields = {
+            name: _construct_trusted(field.annotation, value[name])
+            for name, field in annotation.model_fields.items()
+            if name in value
+        }
+        return annotation.model_construct(**fields)
     return value
 
-# --- TYPE-SAFE, HIERARCHICAL MODELS ---
-
-# --- Infrastructure Models ---
-class ExchangeSettings(BaseModel):
-    client_id: str
-    client_secret: str
-    ws_url: Optional[str] = None
-    rest_url: Optional[str] = None
-
-class RedisSettings(BaseModel):
-    url: str
-    db: int
-    password: Optional[str] = None
-
-class PostgresSettings(BaseModel):
-    user: str
-    password: str
-    host: str
-    port: int
-    db: str
-
-class OCISettings(BaseModel):
-    user: str
-    password: str
-    dsn: str
-    wallet_dir: str
-
-# --- Business Logic Models (for executor.toml) ---
-class RiskManagementSettings(BaseModel):
-    max_order_notional_usd: float
-    max_position_notional_usd: float
-    price_deviation_tolerance_pct: float
-    equity_dust_threshold: float
-
-class ReconciliationSettings(BaseModel):
-    interval_seconds: int
-    initial_delay_seconds: int
-
-class ExecutorServiceSettings(BaseModel):
-    reconciliation: ReconciliationSettings
-
-class RegimeParameterSettings(BaseModel):
-    hedge_ratio: float
-    execution_horizon_minutes: int
-    order_type: str
-    time_in_force: str
-    ttl_seconds: int
-
-class UsdSyntheticStrategySettings(BaseModel):
-    drift_threshold_contracts: int
-    twap_clip_pct: float
-
-class StrategySettings(BaseModel):
-    usdSynthetic: UsdSyntheticStrategySettings
-
-class RedisStreamSettings(BaseModel):
-    max_retries: int = 3
-
-class TradableItem(BaseModel):
-    spot: List[str]
-
-class AnalyzerSettings(BaseModel):
-    # These fields would be moved from the TOML file into this structure
-    instrument_sync_interval_s: int = 3600
-    anomaly_check_interval_s: int = 15
-    
-class BackfillSettings(BaseModel):
-    # ... (fields for backfill)
-    pass
-
-class DistributorSettings(BaseModel):
-    # ... (fields for distributor)
-    pass
-
-class JanitorSettings(BaseModel):
-    # ... (fields for janitor)
-    pass
-
-class MaintenanceSettings(BaseModel):
-    # ... (fields for maintenance)
-    pass
-
-
-# --- THE CENTRAL SERVICE CONTAINER ---
-class ServiceSettings(BaseModel):
-    """This model contains all optional, service-specific operational configs."""
-    executor: Optional[ExecutorServiceSettings] = None
-    analyzer: Optional[AnalyzerSettings] = None
-    # distributor: Optional[DistributorSettings] = None # Future
-    # maintenance: Optional[MaintenanceSettings] = None # Future
-
-# --- AppSettings now uses the central container ---
-class AppSettings(BaseModel):
-    # ... (service_name, environment, exchanges, etc. are correct) ...
-
-    # This is now the single point of entry for all service-specific operational settings
-    services: Optional[ServiceSettings] = None
-    
-# --- COMPOSITED TOP-LEVEL SETTINGS OBJECT ---
-class AppSettings(BaseModel):
-    service_name: str
-    environment: str
-    
-    # --- Infrastructure (Mandatory) ---
-    exchanges: Dict[str, ExchangeSettings]
-    redis: RedisSettings
-    redis_streams: RedisStreamSettings = Field(default_factory=RedisStreamSettings) # Added
-
-    # --- Infrastructure (Optional) ---
-    postgres: Optional[PostgresSettings] = None
-    oci: Optional[OCISettings] = None
-    
-    # --- Service-Specific Business Logic (All Optional) ---
-    # Pydantic will only populate these if the sections exist in the TOML file.
-    risk_management: Optional[RiskManagementSettings] = None
-    services: Optional[ServiceSettings] = None
-    regime_parameters: Optional[Dict[str, RegimeParameterSettings]] = None
-    strategies: Optional[StrategySettings] = None
-    tradable: List[TradableItem] = []
-    analyzer: Optional[AnalyzerSettings] = None
-    
-    # --- Derived Properties ---
-    hedged_currencies: List[str] = []
-
-    @model_validator(mode="after")
-    def build_derived_fields(self) -> "AppSettings":
-        if self.tradable:
-            derived_hedged_currencies = []
-            for item in self.tradable:
-                derived_hedged_currencies.extend(item.spot)
-            self.hedged_currencies = sorted(set(derived_hedged_currencies))
-        return self
-
-# --- Environment Variable Loader (Correct) ---
-class RawEnvSettings(BaseSettings):
-    SERVICE_NAME: str = "unknown"
-    ENVIRONMENT: str = "development"
-    REDIS_URL: str = "redis://localhost:6379"
-    REDIS_DB: int = 0
-    REDIS_PASSWORD: Optional[str] = None
-    POSTGRES_USER: str = "trading_app"
-    POSTGRES_PASSWORD: Optional[str] = None
-    POSTGRES_PASSWORD_FILE: Optional[str] = None
-    POSTGRES_HOST: str = "postgres"
-    POSTGRES_PORT: int = 5432
-    POSTGRES_DB: str = "trading"
-    DERIBIT_CLIENT_ID_FILE: Optional[str] = None
-    DERIBIT_CLIENT_SECRET_FILE: Optional[str] = None
-    OCI_DSN_FILE: Optional[str] = None
-    OCI_USER_FILE: Optional[str] = None
-    OCI_PASSWORD_FILE: Optional[str] = None
-    OCI_WALLET_DIR: Optional[str] = None
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
-
 # --- REFACTORED load_settings() FUNCTION ---
 def load_settings() -> AppSettings:
     log.info("Loading application configuration...")
@@ -181,36 +143,44 @@ def load_settings() -> AppSettings:
 
     # 1. Load the service-specific TOML file.
     toml_data = {}
-    service_config_path = Path(__file__).parent / f"{raw_env.SERVICE_NAME}.toml"
+    service_config_path = _CONFIG_DIR / f"{raw_env.SERVICE_NAME}.toml"
     try:
-        with open(service_config_path, "rb") as f:
-            toml_data = tomli.load(f)
+        toml_data = _load_toml(service_config_path)
         log.info(f"Successfully loaded service-specific config from {service_config_path}")
     except FileNotFoundError:
         log.warning(f"No service-specific config found at {service_config_path}. This may be normal.")
 
-    # 2. Assemble the final data dictionary for validation.
+    # 2. Read every secret file this service needs in one batch.
+    requires_db = raw_env.SERVICE_NAME in _SERVICES_REQUIRING_DB
+    requires_oci = raw_env.SERVICE_NAME == "executor"
+    secret_files = [raw_env.DERIBIT_CLIENT_ID_FILE, raw_env.DERIBIT_CLIENT_SECRET_FILE]
+    if requires_db:
+        secret_files.append(raw_env.POSTGRES_PASSWORD_FILE)
+    if requires_oci:
+        secret_files += [raw_env.OCI_DSN_FILE, raw_env.OCI_USER_FILE, raw_env.OCI_PASSWORD_FILE]
+    secrets = _read_secret_files(secret_files)
+
+    # 3. Assemble the final data dictionary for validation.
+    # EXCHANGES__* env vars supply per-exchange values; Deribit secret files take precedence.
+    # Any other exchange named there must carry its own CLIENT_ID/CLIENT_SECRET or startup fails.
+    exchanges = {name: dict(values) for name, values in raw_env.EXCHANGES.items()}
+    deribit = exchanges.setdefault("deribit", {})
+    deribit["client_id"] = secrets.get(raw_env.DERIBIT_CLIENT_ID_FILE, deribit.get("client_id"))
+    deribit["client_secret"] = secrets.get(raw_env.DERIBIT_CLIENT_SECRET_FILE, deribit.get("client_secret"))
+
     final_data = {
         "service_name": raw_env.SERVICE_NAME,
         "environment": raw_env.ENVIRONMENT,
-        # Infrastructure from environment
-        "exchanges": {
-            "deribit": ExchangeSettings(
-                client_id=read_secret(None, raw_env.DERIBIT_CLIENT_ID_FILE),
-                client_secret=read_secret(None, raw_env.DERIBIT_CLIENT_SECRET_FILE),
-            )
-        },
-        "redis": RedisSettings(
-            url=raw_env.REDIS_URL, db=raw_env.REDIS_DB, password=raw_env.REDIS_PASSWORD
-        ),
+        # Infrastructure from environment/secrets is always validated, even in production.
+        "exchanges": {name: ExchangeSettings.model_validate(values) for name, values in exchanges.items()},
+        "redis": RedisSettings(url=raw_env.REDIS_URL, db=raw_env.REDIS_DB, password=raw_env.REDIS_PASSWORD),
         # Inject the entire loaded TOML data structure
         **toml_data,
     }
 
-    # 3. Conditionally add DB connections
-    services_requiring_db = ["distributor", "executor", "janitor", "maintenance", "analyzer", "backfill"]
-    if raw_env.SERVICE_NAME in services_requiring_db:
-        pg_password = read_secret(raw_env.POSTGRES_PASSWORD, raw_env.POSTGRES_PASSWORD_FILE)
+    # 4. Conditionally add DB connections
+    if requires_db:
+        pg_password = secrets.get(raw_env.POSTGRES_PASSWORD_FILE, raw_env.POSTGRES_PASSWORD)
         if not pg_password:
             raise ValueError(f"PostgreSQL password not found for service '{raw_env.SERVICE_NAME}'.")
         final_data["postgres"] = PostgresSettings(
@@ -218,10 +188,10 @@ def load_settings() -> AppSettings:
             host=raw_env.POSTGRES_HOST, port=raw_env.POSTGRES_PORT, db=raw_env.POSTGRES_DB,
         )
     
-    if raw_env.SERVICE_NAME == "executor":
-        oci_dsn = read_secret(None, raw_env.OCI_DSN_FILE)
-        oci_user = read_secret(None, raw_env.OCI_USER_FILE)
-        oci_password = read_secret(None, raw_env.OCI_PASSWORD_FILE)
+    if requires_oci:
+        oci_dsn = secrets.get(raw_env.OCI_DSN_FILE)
+        oci_user = secrets.get(raw_env.OCI_USER_FILE)
+        oci_password = secrets.get(raw_env.OCI_PASSWORD_FILE)
         if all([oci_dsn, oci_user, oci_password, raw_env.OCI_WALLET_DIR]):
             final_data["oci"] = OCISettings(
                 dsn=oci_dsn, user=oci_user, password=oci_password, wallet_dir=raw_env.OCI_WALLET_DIR
@@ -229,9 +199,32 @@ def load_settings() -> AppSettings:
         else:
             raise ValueError("Executor service is missing required OCI secrets.")
 
-    # 4. Validate the entire structure with Pydantic
-    final_settings = AppSettings.model_validate(final_data)
-    log.info(f"Configuration for '{final_settings.service_name}' loaded and validated.")
+    # 5. Validate the entire structure with Pydantic. Production trusts the
+    # team-authored TOML sections and builds them unvalidated (the env/secret models
+    # above are already validated instances and are kept as-is); every other
+    # environment validates fully so schema drift is caught in development and CI.
+    if raw_env.ENVIRONMENT == "production":
+        final_settings = _construct_trusted(AppSettings, final_data)
+        log.info(f"Configuration for '{final_settings.service_name}' loaded (TOML sections trusted, unvalidated).")
+    else:
+        final_settings = _adapter(AppSettings).validate_python(final_data)
+        log.info(f"Configuration for '{final_settings.service_name}' loaded and validated.")
     return final_settings
 
-settings = load_settings()
\ No newline at end of file
+
+@lru_cache(maxsize=1)
+def get_settings() -> AppSettings:
+    """Return the process-wide settings, loading them on first use only.
+
+    The env (RawEnvSettings) is parsed inside this cached call, so it is memoized too.
+    Call `get_settings.cache_clear()` to force the next call to re-read the env and TOML.
+    """
+    return load_settings()
+
+
+def __getattr__(name: str) -> Any:
+    # PEP 562: `settings` is materialized lazily so importing this module is cheap
+    # and repeated imports/reloads reuse the cached instance.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")